@@ -1,20 +1,35 @@
-
 #!/bin/bash
+set -euo pipefail
 
 echo "🚀 Preparing HuggingFace Space deployment..."
 
 # Create saved_models directory if it doesn't exist
 mkdir -p saved_models
 
-# Copy model files from ml_model
+# Copy model files from ml_model, replacing any from an older training run
 echo "📦 Copying model files..."
+rm -f saved_models/*.pkl saved_models/*.json saved_models/*.onnx
 cp ../ml_model/saved_models/*.pkl saved_models/
+cp ../ml_model/saved_models/*.json saved_models/ 2>/dev/null || true
 cp ../ml_model/saved_models/model_info.txt saved_models/
 
+# Copy the shared API package (app.py is a thin launcher around it)
+echo "📦 Copying API package..."
+rm -rf labvio_api
+cp -r ../ml_model/labvio_api labvio_api
+rm -rf labvio_api/__pycache__
+# Checksums let the Docker build reject a stale or edited copy (stock macOS
+# has shasum but not sha256sum; both write the format sha256sum --check reads)
+if command -v sha256sum >/dev/null; then
+    (cd labvio_api && sha256sum *.py > SHA256SUMS)
+else
+    (cd labvio_api && shasum -a 256 *.py > SHA256SUMS)
+fi
+
 echo "✅ Files copied successfully!"
 echo ""
 echo "📋 Files ready for HuggingFace deployment:"
-ls -lh saved_models/
+ls -lh saved_models/ labvio_api/
 echo ""
 echo "📝 Next steps:"
 echo "1. Go to https://huggingface.co/spaces"
@@ -0,0 +1,6 @@
+"""
+LabVio prediction API package
+Shared by ml_model/predict_api.py and hf-space/app.py
+"""
+
+from .core import create_app, load_models
@@ -0,0 +1,841 @@
+"""
+Shared Flask API for unified health risk predictions
+Single model handles CBC, Urinalysis, and Lipid profiles
+Includes lab_type as a feature for context-aware predictions
+Served by ml_model/predict_api.py (local) and hf-space/app.py (HuggingFace Spaces)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+
+# Inputs are validated in parse_value, so skip sklearn's per-call NaN/inf scan
+os.environ.setdefault('SKLEARN_ASSUME_FINITE', '1')
+
+import numpy as np
+import orjson
+from flask import Blueprint, Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+# Same logger as app.logger, since create_app() names the app after this module
+logger = logging.getLogger(__name__)
+api = Blueprint('labvio_api', __name__)
+
+# Philippine time for request logs; resolved once instead of per request
+PH_TZ = ZoneInfo('Asia/Manila')
+
+# HTML UI Template
+HTML_TEMPLATE = '''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>LabVio ML API</title>
+    <style>
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', 'Oxygen', 'Ubuntu', 'Cantarell', sans-serif;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            min-height: 100vh;
+            display: flex;
+            justify-content: center;
+            align-items: center;
+            padding: 20px;
+        }
+        .container {
+            background: white;
+            border-radius: 16px;
+            box-shadow: 0 20px 60px rgba(0, 0, 0, 0.3);
+            max-width: 600px;
+            width: 100%;
+            padding: 40px;
+        }
+        .header {
+            text-align: center;
+            margin-bottom: 40px;
+        }
+        .header h1 {
+            color: #333;
+            font-size: 32px;
+            margin-bottom: 8px;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            background-clip: text;
+        }
+        .header p {
+            color: #666;
+            font-size: 14px;
+        }
+        .status {
+            display: flex;
+            align-items: center;
+            gap: 8px;
+            margin-bottom: 30px;
+            padding: 12px 16px;
+            background: #f0f4ff;
+            border-radius: 8px;
+            border-left: 4px solid #667eea;
+        }
+        .status.healthy {
+            background: #f0fdf4;
+            border-left-color: #10b981;
+        }
+        .status.healthy .indicator {
+            background: #10b981;
+        }
+        .indicator {
+            width: 12px;
+            height: 12px;
+            border-radius: 50%;
+            background: #667eea;
+            animation: pulse 2s infinite;
+        }
+        @keyframes pulse {
+            0%, 100% { opacity: 1; }
+            50% { opacity: 0.5; }
+        }
+        .status-text {
+            color: #333;
+            font-size: 14px;
+            font-weight: 500;
+        }
+        .features {
+            margin-bottom: 30px;
+        }
+        .features h2 {
+            color: #333;
+            font-size: 18px;
+            margin-bottom: 16px;
+        }
+        .feature-list {
+            list-style: none;
+        }
+        .feature-list li {
+            color: #555;
+            font-size: 14px;
+            padding: 8px 0;
+            padding-left: 24px;
+            position: relative;
+        }
+        .feature-list li:before {
+            content: "✓";
+            position: absolute;
+            left: 0;
+            color: #10b981;
+            font-weight: bold;
+        }
+        .endpoints {
+            margin-bottom: 30px;
+        }
+        .endpoints h2 {
+            color: #333;
+            font-size: 18px;
+            margin-bottom: 16px;
+        }
+        .endpoint {
+            background: #f8fafc;
+            border-radius: 8px;
+            padding: 12px 16px;
+            margin-bottom: 12px;
+            border-left: 4px solid #667eea;
+        }
+        .endpoint-method {
+            display: inline-block;
+            padding: 2px 8px;
+            border-radius: 4px;
+            font-size: 12px;
+            font-weight: 600;
+            margin-right: 8px;
+        }
+        .endpoint-method.get {
+            background: #dbeafe;
+            color: #1e40af;
+        }
+        .endpoint-method.post {
+            background: #dbeafe;
+            color: #1e40af;
+        }
+        .endpoint-path {
+            font-family: 'Courier New', monospace;
+            color: #333;
+            font-size: 14px;
+            margin-top: 4px;
+        }
+        .cta {
+            display: grid;
+            grid-template-columns: 1fr 1fr;
+            gap: 12px;
+        }
+        button {
+            padding: 12px 24px;
+            border: none;
+            border-radius: 8px;
+            font-size: 14px;
+            font-weight: 600;
+            cursor: pointer;
+            transition: all 0.3s ease;
+        }
+        .btn-primary {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+        }
+        .btn-primary:hover {
+            transform: translateY(-2px);
+            box-shadow: 0 10px 20px rgba(102, 126, 234, 0.3);
+        }
+        .btn-secondary {
+            background: #f0f4ff;
+            color: #667eea;
+            border: 1px solid #667eea;
+        }
+        .btn-secondary:hover {
+            background: #667eea;
+            color: white;
+        }
+        .info {
+            background: #fef3c7;
+            border-left: 4px solid #f59e0b;
+            padding: 12px 16px;
+            border-radius: 8px;
+            margin-top: 20px;
+            font-size: 12px;
+            color: #92400e;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🔬 LabVio ML API</h1>
+            <p>Health Risk Prediction Service</p>
+        </div>
+
+        <div class="status healthy">
+            <div class="indicator"></div>
+            <div class="status-text">Service Status: <strong>Operational</strong></div>
+        </div>
+
+        <div class="features">
+            <h2>Features</h2>
+            <ul class="feature-list">
+                <li>Unified ML Model for multiple lab types</li>
+                <li>CBC, Urinalysis, and Lipid Profile support</li>
+                <li>Real-time health risk predictions</li>
+                <li>High accuracy predictions (~99%)</li>
+            </ul>
+        </div>
+
+        <div class="endpoints">
+            <h2>API Endpoints</h2>
+            <div class="endpoint">
+                <div>
+                    <span class="endpoint-method get">GET</span>
+                    <span class="endpoint-path">/health</span>
+                </div>
+                <p style="color: #666; font-size: 12px; margin-top: 4px;">Health check endpoint</p>
+            </div>
+            <div class="endpoint">
+                <div>
+                    <span class="endpoint-method post">POST</span>
+                    <span class="endpoint-path">/predict</span>
+                </div>
+                <p style="color: #666; font-size: 12px; margin-top: 4px;">Predict health risk from lab values</p>
+            </div>
+            <div class="endpoint">
+                <div>
+                    <span class="endpoint-method post">POST</span>
+                    <span class="endpoint-path">/predict_batch</span>
+                </div>
+                <p style="color: #666; font-size: 12px; margin-top: 4px;">Predict health risk for many samples in one call</p>
+            </div>
+        </div>
+
+        <div class="cta">
+            <button class="btn-primary" onclick="location.href='/health'">Check Health</button>
+            <button class="btn-secondary" onclick="window.open('https://github.com/marjames4/LabVioUltimatum', '_blank')">Documentation</button>
+        </div>
+
+        <div class="info">
+            ℹ️ This is a machine learning API for health risk assessment. It is for research and educational purposes only and should not be used for clinical diagnosis or treatment decisions.
+        </div>
+    </div>
+</body>
+</html>
+'''
+
+# The page has no template variables, so serve it as a static, cacheable body
+_INDEX_HTML = HTML_TEMPLATE.encode('utf-8')
+_INDEX_ETAG = hashlib.sha1(_INDEX_HTML).hexdigest()
+
+# Global model storage
+models = {
+    'scaler': None,
+    'gradient_boosting': None,
+    'logistic_regression': None,
+    'features': None
+}
+
+# /predict only needs these; the logistic regression model is loaded only
+# when LOAD_LR=1, which saves its memory in every worker, and the scaler only
+# exists for older tree models that were trained on standardized input
+REQUIRED_MODELS = ('gradient_boosting', 'features')
+LOAD_LR = os.environ.get('LOAD_LR') == '1'
+
+# Set by load_models() once every required model is in place
+_MODELS_LOADED = False
+
+# /health bodies are constant apart from the loaded flag, so build both up front
+_HEALTH_BODIES = {
+    loaded: orjson.dumps({
+        'status': 'healthy' if loaded else 'unhealthy',
+        'models_loaded': loaded,
+        'service': 'LabVio ML API',
+        'version': '1.0.0'
+    })
+    for loaded in (True, False)
+}
+
+# Feature name -> column index, filled in by load_models()
+FEATURE_INDEX = {}
+N_FEATURES = 0
+
+# Default input row per lab type id (lab type and FEATURE_DEFAULTS laid out in
+# model feature order), plus (name, column) for each lab value the model uses,
+# so rows are filled without building a dict per request
+_DEFAULT_ROWS = ()
+_FEATURE_SLOTS = ()
+_LAB_TYPE_COLUMN = 0
+
+# StandardScaler folded into (X - mean) * (1 / scale), filled in by load_models()
+# when the model ships a scaler.pkl; None means the model takes raw values
+_SCALER_MEAN = None
+_SCALER_INV = None
+
+# ONNX Runtime session for the gradient boosting model, or None to use sklearn
+gb_session = None
+
+# The session returns raw per-class margins summed in float32; this bounds their
+# error, and rows whose class, riskScore or confidence it could change are
+# re-scored with sklearn so both paths return the same response
+ONNX_MARGIN_TOLERANCE = 1e-4
+
+# Per-thread (1, N_FEATURES) input row, reused across requests
+_buffers = threading.local()
+
+# Prediction cache: identical (rounded) input rows skip scaling and the model
+PREDICTION_CACHE_SIZE = 4096
+PREDICTION_PRECISION = 4
+
+# Upper bound on samples per /predict_batch request
+MAX_BATCH_SIZE = 1000
+
+# Risk level mapping
+RISK_LEVELS = {
+    0: 'low',
+    1: 'moderate',
+    2: 'high'
+}
+
+# Risk score (0-100 scale) is the probability-weighted sum of these per-class scores
+_RISK_WEIGHTS = np.array([15.0, 50.0, 85.0], dtype=np.float32)
+
+# Lab type mapping
+LAB_TYPE_MAP = {
+    'cbc': 0,
+    'urinalysis': 1,
+    'urine': 1,
+    'lipid': 2,
+    'lipid profile': 2
+}
+
+# Substring fallback for labels like "Complete Blood Count (CBC)", in priority order
+_LAB_TYPE_ITEMS = tuple(LAB_TYPE_MAP.items())
+
+# Normal-range defaults for lab values missing from a request, in feature order
+FEATURE_DEFAULTS = {
+    # CBC
+    'wbc': 7.5, 'rbc': 4.7, 'hemoglobin': 14.0, 'platelets': 250.0,
+    # CBC differential (decimals)
+    'neutrophils': 0.62, 'lymphocytes': 0.30, 'monocytes': 0.05, 'eosinophils': 0.02, 'basophils': 0.005,
+    # Lipid
+    'cholesterol': 180.0, 'hdl': 55.0, 'ldl': 100.0, 'triglycerides': 140.0, 'vldl': 28.0,
+    # Glucose/A1C
+    'glucose': 95.0, 'a1c': 5.4,
+    # Urinalysis (blood/leukocyte_esterase are cells/HPF, 0-50+ scale)
+    'ph': 6.5, 'specific_gravity': 1.015, 'protein': 0.0, 'ketones': 0.0,
+    'blood': 0.0, 'nitrites': 0.0, 'leukocyte_esterase': 0.0
+}
+
+# Per-lab-type overrides: outside CBC the model was trained with the
+# differential at 0.0 ("not applicable") rather than normal values
+LAB_TYPE_DEFAULTS = {
+    1: dict.fromkeys(('neutrophils', 'lymphocytes', 'monocytes', 'eosinophils', 'basophils'), 0.0),
+    2: dict.fromkeys(('neutrophils', 'lymphocytes', 'monocytes', 'eosinophils', 'basophils'), 0.0)
+}
+
+# Qualitative results (e.g. urine dipstick) mapped to numeric values
+_STRING_MAP = {
+    'positive': 1.0,
+    'trace': 1.0,
+    'negative': 0.0
+}
+
+def load_models(save_dir):
+    """Load unified trained models from save_dir"""
+    global FEATURE_INDEX, N_FEATURES, gb_session, _SCALER_MEAN, _SCALER_INV
+    global _DEFAULT_ROWS, _FEATURE_SLOTS, _LAB_TYPE_COLUMN, _MODELS_LOADED
+    _MODELS_LOADED = False
+    try:
+        scaler_path = os.path.join(save_dir, 'scaler.pkl')
+        gb_path = os.path.join(save_dir, 'gradient_boosting.pkl')
+        lr_path = os.path.join(save_dir, 'logistic_regression.pkl')
+        features_path = os.path.join(save_dir, 'features.json')
+        
+        model_paths = {'gradient_boosting': gb_path}
+        if os.path.exists(features_path):
+            # Written by train_model.py: the feature order and whether the
+            # tree model was trained on standardized input
+            feature_info = load_artifact(features_path)
+            scaled_input = feature_info['scaled_input']
+        else:
+            # Older models keep their features in a pickle and were all
+            # trained on standardized input
+            feature_info = None
+            scaled_input = True
+            model_paths['features'] = os.path.join(save_dir, 'features.pkl')
+        if scaled_input:
+            model_paths['scaler'] = scaler_path
+        if LOAD_LR:
+            model_paths['logistic_regression'] = lr_path
+        # Checked first: without the scaler the model still loads but mispredicts
+        if scaled_input and not os.path.exists(scaler_path):
+            raise FileNotFoundError(f"{scaler_path} not found; the model was trained on scaled input")
+        if not all(os.path.exists(p) for p in model_paths.values()):
+            raise FileNotFoundError("Model files not found. Please run train_model.py first.")
+        
+        # Import the estimator packages up front: racing first-time imports
+        # from the loader threads can see partially initialised sklearn modules
+        import sklearn.ensemble
+        import sklearn.linear_model
+        import sklearn.pipeline
+        import sklearn.preprocessing  # noqa: F401
+
+        # Load the pickles concurrently
+        with ThreadPoolExecutor(max_workers=len(model_paths)) as pool:
+            loaded = pool.map(load_artifact, model_paths.values())
+            models.update(dict.fromkeys(models))
+            models.update(zip(model_paths, loaded))
+        if feature_info is not None:
+            models['features'] = feature_info['features']
+        
+        FEATURE_INDEX = {name: i for i, name in enumerate(models['features'])}
+        N_FEATURES = len(models['features'])
+        _LAB_TYPE_COLUMN = FEATURE_INDEX['lab_type']
+        # Models trained before a feature was added simply don't get it
+        _FEATURE_SLOTS = tuple((key, FEATURE_INDEX[key]) for key in FEATURE_DEFAULTS if key in FEATURE_INDEX)
+        _DEFAULT_ROWS = tuple(default_row(lab_type_id) for lab_type_id in range(max(LAB_TYPE_MAP.values()) + 1))
+        scaler = models['scaler']
+        _SCALER_MEAN = None if scaler is None else scaler.mean_.astype(np.float64)
+        _SCALER_INV = None if scaler is None else 1.0 / scaler.scale_.astype(np.float64)
+        gb_session = load_onnx_session(gb_path)
+        predict_row.cache_clear()
+        _MODELS_LOADED = all(models[name] is not None for name in REQUIRED_MODELS)
+        warm_up()
+        
+        print("✅ Unified model loaded successfully!")
+        if scaler is not None:
+            print(f"   - Scaler: {scaler_path}")
+        print(f"   - Gradient Boosting: {gb_path}")
+        if LOAD_LR:
+            print(f"   - Logistic Regression: {lr_path}")
+        if gb_session is not None:
+            print(f"   - ONNX Runtime: {os.path.splitext(gb_path)[0]}.onnx")
+        print(f"   - Features: {len(models['features'])} features\n")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Error loading models: {e}")
+        return False
+
+def load_artifact(path):
+    """Load a model file: JSON as-is, pickles through joblib (memory-mapping their arrays when uncompressed)"""
+    if path.endswith('.json'):
+        with open(path) as f:
+            return json.load(f)
+    
+    # Only needed here, so importing the API module stays cheap
+    import joblib
+    
+    # Uncompressed pickles start with the PROTO opcode; compressed dumps start
+    # with the codec's magic bytes and can't be memory-mapped
+    with open(path, 'rb') as f:
+        compressed = f.read(1) != b'\x80'
+    # mmap_mode maps numpy arrays from the page cache instead of copying them,
+    # so preforked workers share them
+    return joblib.load(path, mmap_mode=None if compressed else 'r')
+
+def default_row(lab_type_id):
+    """Input row of normal-range defaults for one lab type"""
+    overrides = LAB_TYPE_DEFAULTS.get(lab_type_id, {})
+    row = np.zeros(N_FEATURES, dtype=np.float64)
+    row[_LAB_TYPE_COLUMN] = lab_type_id
+    for key, column in _FEATURE_SLOTS:
+        row[column] = overrides.get(key, FEATURE_DEFAULTS[key])
+    return row
+
+def warm_up():
+    """Run a few throwaway predictions so the first request doesn't pay for
+    paging in the trees and first-call setup. Under gunicorn --preload this
+    runs in the master, so forked workers start warm."""
+    try:
+        X = np.empty((1, N_FEATURES), dtype=np.float64)
+        fill_features({}, X[0])
+        for _ in range(3):
+            predict_proba(X)
+    except Exception as e:
+        print(f"⚠️  Model warm-up failed: {e}")
+
+def feature_buffer():
+    """Return this thread's reusable (1, N_FEATURES) input row"""
+    X = getattr(_buffers, 'X', None)
+    if X is None or X.shape[1] != N_FEATURES:
+        # float64 matches the dtype the scaler was fitted with
+        X = _buffers.X = np.empty((1, N_FEATURES), dtype=np.float64)
+    return X
+
+def load_onnx_session(gb_path):
+    """Compile the gradient boosting model to ONNX Runtime, or return None if unavailable"""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return None
+    
+    onnx_path = os.path.splitext(gb_path)[0] + '.onnx'
+    try:
+        onnx_model = None
+        if os.path.exists(onnx_path) and os.path.getmtime(onnx_path) >= os.path.getmtime(gb_path):
+            with open(onnx_path, 'rb') as f:
+                onnx_model = f.read()
+            # Files cached by older versions end in a float32 softmax
+            cached = ort.InferenceSession(onnx_model, providers=['CPUExecutionProvider'])
+            if cached.get_modelmeta().custom_metadata_map.get('output') != 'margins':
+                onnx_model = None
+        if onnx_model is None:
+            from skl2onnx import convert_sklearn
+            from skl2onnx.common.data_types import FloatTensorType
+            
+            gb_model = models['gradient_boosting']
+            converted = convert_sklearn(
+                gb_model,
+                initial_types=[('input', FloatTensorType([None, N_FEATURES]))],
+                options={id(gb_model): {'zipmap': False}}
+            )
+            # Stop at the raw margins: predict_proba applies the softmax in
+            # float64, where float32 would round near-certain classes to 1.0
+            for node in converted.graph.node:
+                if node.op_type == 'TreeEnsembleClassifier':
+                    for attribute in node.attribute:
+                        if attribute.name == 'post_transform':
+                            attribute.s = b'NONE'
+            converted.metadata_props.add(key='output', value='margins')
+            onnx_model = converted.SerializeToString()
+            try:
+                with open(onnx_path, 'wb') as f:
+                    f.write(onnx_model)
+            except OSError:
+                pass  # Read-only deployment: convert again on next start
+        
+        # Tree thresholds are exported as float32 (half the bytes per node of
+        # sklearn's float64); int8 dynamic quantization skips tree ensembles.
+        # Single-row calls: a thread pool only adds overhead
+        options = ort.SessionOptions()
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        session = ort.InferenceSession(onnx_model, sess_options=options, providers=['CPUExecutionProvider'])
+        
+        mismatches = onnx_mismatches(session)
+        if mismatches:
+            print(f"⚠️  ONNX Runtime changed {mismatches} probe responses, using scikit-learn")
+            return None
+        return session
+    except Exception as e:
+        # Converter errors can embed the whole tree ensemble; keep the first line
+        summary = str(e).split('\n', 1)[0]
+        print(f"⚠️  ONNX Runtime unavailable, using scikit-learn: {summary}")
+        return None
+
+def response_fields(probabilities):
+    """(class, riskScore, confidence) per row, as the responses compute them"""
+    risk_classes = np.argmax(probabilities, axis=1)
+    return np.column_stack([
+        risk_classes,
+        (probabilities @ _RISK_WEIGHTS).astype(np.int32),
+        (probabilities[np.arange(len(probabilities)), risk_classes] * 100).astype(np.int32)
+    ])
+
+def onnx_mismatches(session):
+    """Count probe rows (each lab type's defaults, randomly scaled) whose class,
+    riskScore or confidence differs between the ONNX session and sklearn"""
+    rng = np.random.default_rng(0)
+    X = np.repeat(np.stack(_DEFAULT_ROWS), 200, axis=0)
+    columns = [column for _, column in _FEATURE_SLOTS]
+    X[:, columns] *= rng.uniform(0.0, 3.0, size=(len(X), len(columns)))
+    np.round(X, PREDICTION_PRECISION, out=X)
+    if _SCALER_MEAN is not None:
+        X = (X - _SCALER_MEAN) * _SCALER_INV
+    
+    expected = response_fields(models['gradient_boosting'].predict_proba(X))
+    actual = response_fields(onnx_predict_proba(session, X))
+    return int(np.any(expected != actual, axis=1).sum())
+
+def onnx_predict_proba(session, X):
+    """Softmax the session's margins in float64, re-scoring with sklearn the rows
+    where ONNX_MARGIN_TOLERANCE could move a class, riskScore or confidence boundary"""
+    margins = session.run(None, {'input': X.astype(np.float32)})[1].astype(np.float64)
+    exp_margins = np.exp(margins - margins.max(axis=1, keepdims=True))
+    probabilities = exp_margins / exp_margins.sum(axis=1, keepdims=True)
+    
+    # A margin error of d moves each probability p by at most 2*d*p (and the
+    # top one by 2*d*p*(1 - p)), so the bounds below are tight near certainty
+    slack = 2 * ONNX_MARGIN_TOLERANCE
+    top_two = np.sort(probabilities, axis=1)[:, -2:]
+    scores = probabilities @ _RISK_WEIGHTS
+    score_slack = slack * np.sum(probabilities * np.abs(_RISK_WEIGHTS - scores[:, None]), axis=1)
+    confidences = top_two[:, 1] * 100
+    confidence_slack = slack * confidences * (1 - top_two[:, 1])
+    near_boundary = (
+        (top_two[:, 1] - top_two[:, 0] <= slack * top_two[:, 1])
+        | (np.abs(scores - np.round(scores)) <= score_slack)
+        | (np.abs(confidences - np.round(confidences)) <= confidence_slack)
+    )
+    if near_boundary.any():
+        probabilities[near_boundary] = models['gradient_boosting'].predict_proba(X[near_boundary])
+    return probabilities
+
+def predict_proba(X):
+    """Scale input rows if the model expects it and return class probabilities, shape (n_rows, 3)"""
+    if _SCALER_MEAN is not None:
+        X = (X - _SCALER_MEAN) * _SCALER_INV
+    if gb_session is not None:
+        return onnx_predict_proba(gb_session, X)
+    return models['gradient_boosting'].predict_proba(X)
+
+@functools.lru_cache(maxsize=PREDICTION_CACHE_SIZE)
+def predict_row(row_bytes):
+    """Classify one input row given as float64 bytes"""
+    X = np.frombuffer(row_bytes, dtype=np.float64).reshape(1, N_FEATURES)
+    probabilities = predict_proba(X)[0]
+    return int(np.argmax(probabilities)), tuple(probabilities.tolist())
+
+def parse_value(value, default=0.0):
+    """Parse value from string or number"""
+    if isinstance(value, str):
+        try:
+            parsed = float(value)
+        except ValueError:
+            return _STRING_MAP.get(value.lower(), default)
+    elif isinstance(value, (int, float)):
+        parsed = float(value)
+    else:
+        return default
+    return parsed if math.isfinite(parsed) else default
+
+def fill_features(data, row):
+    """Write one request payload into a feature row, falling back to normal-range defaults"""
+    # Map lab type: exact match first, then substring match, defaulting to CBC
+    lab_type = data.get('lab_type')
+    if lab_type is None:
+        lab_type = 'cbc'
+    elif not isinstance(lab_type, str):
+        raise TypeError('lab_type must be a string')
+    lab_type = lab_type.lower().strip()
+    lab_type_id = LAB_TYPE_MAP.get(lab_type)
+    if lab_type_id is None:
+        lab_type_id = next((v for k, v in _LAB_TYPE_ITEMS if k in lab_type), 0)
+    logger.debug("[API] Mapped '%s' to lab_type_id: %s", lab_type, lab_type_id)
+    
+    row[:] = _DEFAULT_ROWS[lab_type_id]
+    for key, column in _FEATURE_SLOTS:
+        value = data.get(key)
+        if value is not None:
+            row[column] = parse_value(value, row[column])
+
+def build_result(risk_class, risk_probabilities, risk_score):
+    """Response body for one prediction"""
+    return {
+        'riskLevel': RISK_LEVELS[risk_class],
+        'riskScore': risk_score,
+        'confidence': int(risk_probabilities[risk_class] * 100),
+        'model': 'gradient_boosting_unified',
+        'probabilities': {
+            'low': risk_probabilities[0],
+            'moderate': risk_probabilities[1],
+            'high': risk_probabilities[2]
+        }
+    }
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serializes responses with orjson, which also handles numpy scalars.
+    Requests still parse with the stdlib, which accepts NaN/Infinity literals
+    and big integers (parse_value maps them to defaults) where orjson rejects them"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+def create_app():
+    """Create the Flask app serving the prediction API"""
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    CORS(app)
+
+    # Per-request logs are INFO/DEBUG; set LOG_LEVEL=INFO or DEBUG to see them
+    app.logger.setLevel(os.environ.get('LOG_LEVEL', 'WARNING').upper())
+
+    app.register_blueprint(api)
+    return app
+
+@api.route('/', methods=['GET'])
+def index():
+    """Root endpoint - displays web interface"""
+    response = Response(_INDEX_HTML, mimetype='text/html')
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    response.set_etag(_INDEX_ETAG)
+    return response.make_conditional(request)
+
+@api.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return Response(_HEALTH_BODIES[_MODELS_LOADED], mimetype='application/json')
+
+@api.route('/predict', methods=['POST'])
+def predict():
+    """
+    Predict health risk from lab values
+    Single unified model for all lab types
+
+    Expected JSON format:
+    {
+        "lab_type": "cbc",  # or "urinalysis"/"lipid"
+        "wbc": 8.5,
+        "glucose": "110",
+        ...
+    }
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("🔬 Prediction Request | %s", datetime.now(PH_TZ).strftime('%Y-%m-%d %I:%M:%S %p'))
+        logger.debug("[API] Raw data: %s", data)
+
+        # Check if models are loaded
+        if not _MODELS_LOADED:
+            return jsonify({'error': 'Models not loaded'}), 500
+
+        # Fill the input row in model feature order
+        X = feature_buffer()
+        fill_features(data, X[0])
+        logger.debug("[API] Features: %s", X[0])
+
+        # Round so near-identical payloads share a cache entry
+        np.round(X, PREDICTION_PRECISION, out=X)
+
+        # Predict using Gradient Boosting (cached on the rounded row)
+        risk_class, risk_probabilities = predict_row(X.tobytes())
+        logger.debug("[API] Risk class: %s, Probabilities: %s", risk_class, risk_probabilities)
+
+        # Calculate risk score (0-100 scale)
+        risk_score = int(np.dot(risk_probabilities, _RISK_WEIGHTS))
+
+        result = build_result(risk_class, risk_probabilities, risk_score)
+        logger.info("   ✅ Prediction: %s (Score: %s, Confidence: %s%%)",
+                    result['riskLevel'], risk_score, result['confidence'])
+        return jsonify(result)
+
+    except HTTPException as e:
+        # Malformed JSON body
+        return jsonify({'error': e.description}), e.code
+    except (KeyError, ValueError, TypeError) as e:
+        logger.info("[API] Rejected prediction input: %s", e)
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        logger.exception("[API ERROR] Prediction error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """
+    Predict health risk for many samples with a single model call
+
+    Expected JSON format:
+    {
+        "samples": [
+            {"lab_type": "cbc", "wbc": 8.5, ...},
+            {"lab_type": "lipid", "cholesterol": 210, ...}
+        ]
+    }
+
+    Returns {"predictions": [...]} with one /predict-style result per sample
+    """
+    try:
+        data = request.get_json()
+        samples = data.get('samples') if isinstance(data, dict) else None
+        if not samples or not isinstance(samples, list):
+            return jsonify({'error': 'No samples provided'}), 400
+        if len(samples) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'Too many samples (max {MAX_BATCH_SIZE})'}), 400
+        if not all(isinstance(sample, dict) for sample in samples):
+            return jsonify({'error': 'Each sample must be a JSON object'}), 400
+
+        if not _MODELS_LOADED:
+            return jsonify({'error': 'Models not loaded'}), 500
+
+        logger.info("🔬 Batch Prediction Request | %s samples", len(samples))
+
+        # Fill all rows, then scale and predict them in one call
+        X = np.empty((len(samples), N_FEATURES), dtype=np.float64)
+        for row, sample in zip(X, samples):
+            fill_features(sample, row)
+        np.round(X, PREDICTION_PRECISION, out=X)
+
+        probabilities = predict_proba(X)
+        risk_classes = np.argmax(probabilities, axis=1)
+        risk_scores = (probabilities @ _RISK_WEIGHTS).astype(np.int32)
+
+        predictions = [
+            build_result(risk_class, risk_probabilities, risk_score)
+            for risk_class, risk_probabilities, risk_score
+            in zip(risk_classes, probabilities, risk_scores)
+        ]
+        return jsonify({'predictions': predictions})
+
+    except HTTPException as e:
+        # Malformed JSON body
+        return jsonify({'error': e.description}), e.code
+    except (KeyError, ValueError, TypeError) as e:
+        logger.info("[API] Rejected batch input: %s", e)
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        logger.exception("[API ERROR] Batch prediction error")
+        return jsonify({'error': 'Internal server error'}), 500
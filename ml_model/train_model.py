@@ -5,183 +5,248 @@ Single model handles CBC, Urinalysis, and Lipid profiles (10,000 samples)
 Includes lab_type as a feature for differentiation
 """
 
+import json
 import os
+
+import psutil
+
+# Cap the OpenMP/BLAS thread pools at the physical core count before numpy and
+# sklearn create them; hyperthread siblings only contend for the same FPUs
+N_PHYSICAL_CORES = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(var, str(N_PHYSICAL_CORES))
+
 import joblib
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 import datetime
 
-# Set random seed for reproducibility
-np.random.seed(42)
+# Seeded generator for reproducibility (PCG64 is faster than the legacy global MT19937 state)
+RNG = np.random.default_rng(42)
+
+LAB_TYPES = ['cbc', 'urinalysis', 'lipid']  # lab_type 0=cbc, 1=urinalysis, 2=lipid
+
+# Version of the synthetic dataset cached on disk; bump it whenever
+# generate_unified_data, COLUMNS or the ranges change so stale caches are ignored
+DATA_VERSION = 2
+
+# zlib level 3 shrinks the pickles several-fold for little CPU; protocol 5
+# writes the estimators' numpy arrays as out-of-band buffers
+DUMP_OPTIONS = {'compress': 3, 'protocol': 5}
+
+# Share of samples per risk level (0=low, 1=moderate, 2=high)
+RISK_PROBABILITIES = [0.5, 0.3, 0.2]
+# Upper bounds of the low and moderate shares of [0, 1), for inverse-CDF sampling
+RISK_CUMULATIVE = np.cumsum(RISK_PROBABILITIES[:-1], dtype=np.float32)
+
+COLUMNS = [
+    'lab_type',
+    'wbc', 'rbc', 'hemoglobin', 'platelets',
+    'neutrophils', 'lymphocytes', 'monocytes', 'eosinophils', 'basophils',
+    'cholesterol', 'hdl', 'ldl', 'triglycerides', 'vldl',
+    'glucose', 'a1c',
+    'ph', 'specific_gravity', 'protein',
+    'ketones', 'blood', 'nitrites', 'leukocyte_esterase',
+    'risk_level'
+]
+COLUMN_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+# Values for the features a lab type doesn't measure
+FEATURE_DEFAULTS = {
+    'wbc': 7.5,
+    'rbc': 4.7,
+    'hemoglobin': 14.0,
+    'platelets': 250,
+    # CBC differential: 0.0 marks "not applicable" on urinalysis/lipid rows
+    'neutrophils': 0.0,
+    'lymphocytes': 0.0,
+    'monocytes': 0.0,
+    'eosinophils': 0.0,
+    'basophils': 0.0,
+    'cholesterol': 180,
+    'hdl': 55,
+    'ldl': 100,
+    'triglycerides': 140,
+    'vldl': 28,
+    'glucose': 95,
+    'a1c': 5.4,
+    'ph': 6.0,
+    'specific_gravity': 1.015,
+    'protein': 0.0,
+    'ketones': 0.0,
+    'blood': 0.0,
+    'nitrites': 0.0,
+    'leukocyte_esterase': 0.0,
+}
+
+# FEATURE_DEFAULTS laid out as one row in COLUMNS order, broadcast into every block
+# (lab_type and risk_level are filled in per block)
+DEFAULT_ROW = np.array([FEATURE_DEFAULTS.get(name, 0.0) for name in COLUMNS], dtype=np.float32)
+
+# Uniform (low, high) sampling range of each measured feature, per lab type and risk level
+FEATURE_RANGES = {
+    'cbc': {
+        2: {  # High risk
+            'wbc': (3.5, 20.0),
+            'rbc': (2.5, 4.0),
+            'hemoglobin': (8.0, 11.0),
+            'platelets': (50, 150),
+            'glucose': (126, 250),
+            'a1c': (6.5, 12.0),
+            # Differential counts (as decimals)
+            'neutrophils': (0.30, 0.85),
+            'lymphocytes': (0.10, 0.50),
+            'monocytes': (0.00, 0.15),
+            'eosinophils': (0.00, 0.10),
+            'basophils': (0.00, 0.03),
+        },
+        1: {  # Moderate
+            'wbc': (4.0, 12.0),
+            'rbc': (4.0, 5.0),
+            'hemoglobin': (11.5, 13.0),
+            'platelets': (200, 350),
+            'glucose': (100, 125),
+            'a1c': (5.7, 6.4),
+            # Differential counts (as decimals)
+            'neutrophils': (0.50, 0.75),
+            'lymphocytes': (0.15, 0.45),
+            'monocytes': (0.00, 0.10),
+            'eosinophils': (0.00, 0.06),
+            'basophils': (0.00, 0.02),
+        },
+        0: {  # Low
+            'wbc': (4.5, 11.0),
+            'rbc': (4.5, 5.5),
+            'hemoglobin': (13.5, 17.5),
+            'platelets': (150, 400),
+            'glucose': (70, 99),
+            'a1c': (4.0, 5.6),
+            # Normal differential counts (as decimals)
+            'neutrophils': (0.54, 0.70),
+            'lymphocytes': (0.20, 0.40),
+            'monocytes': (0.02, 0.08),
+            'eosinophils': (0.00, 0.05),
+            'basophils': (0.00, 0.01),
+        },
+    },
+    # Clinical decision: High pus cells (>15 WBC/HPF) or high blood (>15 RBC/HPF)
+    # with positive nitrites = HIGH risk (clear UTI/kidney issues)
+    # The KEY indicators are: blood, leukocyte_esterase (pus cells), nitrites
+    'urinalysis': {
+        2: {  # High risk - clear UTI/kidney issues
+            'ph': (4.5, 8.0),  # Can be normal or abnormal
+            'specific_gravity': (1.010, 1.035),
+            'protein': (0.3, 4.0),  # Trace to 3+
+            'glucose': (0, 200),  # Variable
+            'ketones': (0.0, 2.0),
+            # Critical: High cell counts indicate serious infection
+            'blood': (15, 100),  # RBC/HPF - HIGH (>15)
+            'nitrites': (0.5, 2.0),  # Often positive
+            'leukocyte_esterase': (15, 100),  # WBC/HPF - HIGH (>15)
+        },
+        1: {  # Moderate - possible infection, needs monitoring
+            'ph': (5.0, 7.5),
+            'specific_gravity': (1.010, 1.030),
+            'protein': (0.1, 1.0),  # Trace to 1+
+            'glucose': (0, 100),
+            'ketones': (0.0, 1.0),
+            # Moderate elevation - borderline concerning
+            'blood': (4, 15),  # RBC/HPF - borderline (4-15)
+            'nitrites': (0.0, 0.5),  # Negative to trace
+            'leukocyte_esterase': (6, 15),  # WBC/HPF - borderline (6-15)
+        },
+        0: {  # Low - normal urinalysis
+            'ph': (4.5, 8.0),
+            'specific_gravity': (1.005, 1.025),
+            'protein': (0.0, 0.1),  # Negative
+            'glucose': (0.0, 10.0),
+            'ketones': (0.0, 0.2),
+            'blood': (0, 3),  # RBC/HPF - normal (0-3)
+            'nitrites': (0.0, 0.1),  # Negative
+            'leukocyte_esterase': (0, 5),  # WBC/HPF - normal (0-5)
+        },
+    },
+    'lipid': {
+        2: {  # High risk
+            'cholesterol': (240, 320),
+            'hdl': (20, 40),
+            'ldl': (160, 220),
+            'triglycerides': (200, 400),
+            'vldl': (40, 80),
+            'glucose': (126, 250),
+        },
+        1: {  # Moderate
+            'cholesterol': (200, 239),
+            'hdl': (40, 50),
+            'ldl': (130, 159),
+            'triglycerides': (150, 199),
+            'vldl': (30, 40),
+            'glucose': (100, 125),
+        },
+        0: {  # Low
+            'cholesterol': (125, 199),
+            'hdl': (50, 90),
+            'ldl': (50, 129),
+            'triglycerides': (50, 149),
+            'vldl': (10, 30),
+            'glucose': (70, 99),
+        },
+    },
+}
+
+# FEATURE_RANGES as (columns, lows, highs) arrays, so each (lab type, risk level)
+# block is drawn with a single broadcast RNG.uniform call
+RANGE_ARRAYS = {
+    lab_type: {
+        risk: (
+            np.array([COLUMN_INDEX[name] for name in ranges]),
+            np.array([low for low, _ in ranges.values()]),
+            np.array([high for _, high in ranges.values()]),
+        )
+        for risk, ranges in risk_ranges.items()
+    }
+    for lab_type, risk_ranges in FEATURE_RANGES.items()
+}
 
 def generate_unified_data(n_samples=10000):
     """
     Generate unified synthetic data for all lab types (10,000 samples total)
     Features: lab_type + all parameters from CBC, Urinalysis, Lipid profiles
+    Each (lab type, risk level) block is sampled in one call, straight into a
+    single preallocated array
     """
-    data = []
-
     # Distribute samples evenly across lab types
     samples_per_type = n_samples // 3
 
-    lab_types = ['cbc', 'urinalysis', 'lipid']
-
-    for lab_type_idx, lab_type in enumerate(lab_types):
-        for _ in range(samples_per_type):
-            risk = np.random.choice([0, 1, 2], p=[0.5, 0.3, 0.2])
-
-            # Initialize all features with defaults
-            features = {
-                'lab_type': lab_type_idx,  # 0=cbc, 1=urinalysis, 2=lipid
-                'wbc': 7.5,
-                'rbc': 4.7,
-                'hemoglobin': 14.0,
-                'platelets': 250,
-                'cholesterol': 180,
-                'hdl': 55,
-                'ldl': 100,
-                'triglycerides': 140,
-                'vldl': 28,
-                'glucose': 95,
-                'a1c': 5.4,
-                'ph': 6.0,
-                'specific_gravity': 1.015,
-                'protein': 0.0,
-                'ketones': 0.0,
-                'blood': 0.0,
-                'nitrites': 0.0,
-                'leukocyte_esterase': 0.0,
-            }
-
-            # Generate CBC-specific data
-            if lab_type == 'cbc':
-                if risk == 2:  # High risk
-                    features['wbc'] = np.random.uniform(3.5, 20.0)
-                    features['rbc'] = np.random.uniform(2.5, 4.0)
-                    features['hemoglobin'] = np.random.uniform(8.0, 11.0)
-                    features['platelets'] = np.random.uniform(50, 150)
-                    features['glucose'] = np.random.uniform(126, 250)
-                    features['a1c'] = np.random.uniform(6.5, 12.0)
-                    # Differential counts (as decimals)
-                    features['neutrophils'] = np.random.uniform(0.30, 0.85)
-                    features['lymphocytes'] = np.random.uniform(0.10, 0.50)
-                    features['monocytes'] = np.random.uniform(0.00, 0.15)
-                    features['eosinophils'] = np.random.uniform(0.00, 0.10)
-                    features['basophils'] = np.random.uniform(0.00, 0.03)
-                elif risk == 1:  # Moderate
-                    features['wbc'] = np.random.uniform(4.0, 12.0)
-                    features['rbc'] = np.random.uniform(4.0, 5.0)
-                    features['hemoglobin'] = np.random.uniform(11.5, 13.0)
-                    features['platelets'] = np.random.uniform(200, 350)
-                    features['glucose'] = np.random.uniform(100, 125)
-                    features['a1c'] = np.random.uniform(5.7, 6.4)
-                    # Differential counts (as decimals)
-                    features['neutrophils'] = np.random.uniform(0.50, 0.75)
-                    features['lymphocytes'] = np.random.uniform(0.15, 0.45)
-                    features['monocytes'] = np.random.uniform(0.00, 0.10)
-                    features['eosinophils'] = np.random.uniform(0.00, 0.06)
-                    features['basophils'] = np.random.uniform(0.00, 0.02)
-                else:  # Low
-                    features['wbc'] = np.random.uniform(4.5, 11.0)
-                    features['rbc'] = np.random.uniform(4.5, 5.5)
-                    features['hemoglobin'] = np.random.uniform(13.5, 17.5)
-                    features['platelets'] = np.random.uniform(150, 400)
-                    features['glucose'] = np.random.uniform(70, 99)
-                    features['a1c'] = np.random.uniform(4.0, 5.6)
-                    # Normal differential counts (as decimals)
-                    features['neutrophils'] = np.random.uniform(0.54, 0.70)
-                    features['lymphocytes'] = np.random.uniform(0.20, 0.40)
-                    features['monocytes'] = np.random.uniform(0.02, 0.08)
-                    features['eosinophils'] = np.random.uniform(0.00, 0.05)
-                    features['basophils'] = np.random.uniform(0.00, 0.01)
-
-            # Generate Urinalysis-specific data
-            # Clinical decision: High pus cells (>15 WBC/HPF) or high blood (>15 RBC/HPF)
-            # with positive nitrites = HIGH risk (clear UTI/kidney issues)
-            # The KEY indicators are: blood, leukocyte_esterase (pus cells), nitrites
-            elif lab_type == 'urinalysis':
-                if risk == 2:  # High risk - clear UTI/kidney issues
-                    # KEY: Very high pus cells OR blood cells with infection markers
-                    features['ph'] = np.random.uniform(4.5, 8.0)  # Can be normal or abnormal
-                    features['specific_gravity'] = np.random.uniform(1.010, 1.035)
-                    features['protein'] = np.random.uniform(0.3, 4.0)  # Trace to 3+
-                    features['glucose'] = np.random.uniform(0, 200)  # Variable
-                    features['ketones'] = np.random.uniform(0.0, 2.0)
-                    # Critical: High cell counts indicate serious infection
-                    features['blood'] = np.random.uniform(15, 100)  # RBC/HPF - HIGH (>15)
-                    features['nitrites'] = np.random.uniform(0.5, 2.0)  # Often positive
-                    features['leukocyte_esterase'] = np.random.uniform(15, 100)  # WBC/HPF - HIGH (>15)
-                elif risk == 1:  # Moderate - possible infection, needs monitoring
-                    features['ph'] = np.random.uniform(5.0, 7.5)
-                    features['specific_gravity'] = np.random.uniform(1.010, 1.030)
-                    features['protein'] = np.random.uniform(0.1, 1.0)  # Trace to 1+
-                    features['glucose'] = np.random.uniform(0, 100)
-                    features['ketones'] = np.random.uniform(0.0, 1.0)
-                    # Moderate elevation - borderline concerning
-                    features['blood'] = np.random.uniform(4, 15)  # RBC/HPF - borderline (4-15)
-                    features['nitrites'] = np.random.uniform(0.0, 0.5)  # Negative to trace
-                    features['leukocyte_esterase'] = np.random.uniform(6, 15)  # WBC/HPF - borderline (6-15)
-                else:  # Low - normal urinalysis
-                    features['ph'] = np.random.uniform(4.5, 8.0)
-                    features['specific_gravity'] = np.random.uniform(1.005, 1.025)
-                    features['protein'] = np.random.uniform(0.0, 0.1)  # Negative
-                    features['glucose'] = np.random.uniform(0.0, 10.0)
-                    features['ketones'] = np.random.uniform(0.0, 0.2)
-                    features['blood'] = np.random.uniform(0, 3)  # RBC/HPF - normal (0-3)
-                    features['nitrites'] = np.random.uniform(0.0, 0.1)  # Negative
-                    features['leukocyte_esterase'] = np.random.uniform(0, 5)  # WBC/HPF - normal (0-5)
-
-            # Generate Lipid-specific data
-            else:  # lipid
-                if risk == 2:  # High risk
-                    features['cholesterol'] = np.random.uniform(240, 320)
-                    features['hdl'] = np.random.uniform(20, 40)
-                    features['ldl'] = np.random.uniform(160, 220)
-                    features['triglycerides'] = np.random.uniform(200, 400)
-                    features['vldl'] = np.random.uniform(40, 80)
-                    features['glucose'] = np.random.uniform(126, 250)
-                elif risk == 1:  # Moderate
-                    features['cholesterol'] = np.random.uniform(200, 239)
-                    features['hdl'] = np.random.uniform(40, 50)
-                    features['ldl'] = np.random.uniform(130, 159)
-                    features['triglycerides'] = np.random.uniform(150, 199)
-                    features['vldl'] = np.random.uniform(30, 40)
-                    features['glucose'] = np.random.uniform(100, 125)
-                else:  # Low
-                    features['cholesterol'] = np.random.uniform(125, 199)
-                    features['hdl'] = np.random.uniform(50, 90)
-                    features['ldl'] = np.random.uniform(50, 129)
-                    features['triglycerides'] = np.random.uniform(50, 149)
-                    features['vldl'] = np.random.uniform(10, 30)
-                    features['glucose'] = np.random.uniform(70, 99)
-
-            row = [
-                features['lab_type'],
-                features['wbc'], features['rbc'], features['hemoglobin'], features['platelets'],
-                features['cholesterol'], features['hdl'], features['ldl'], features['triglycerides'], features['vldl'],
-                features['glucose'], features['a1c'],
-                features['ph'], features['specific_gravity'], features['protein'],
-                features['ketones'], features['blood'], features['nitrites'], features['leukocyte_esterase'],
-                risk
-            ]
-            data.append(row)
-
-    columns = [
-        'lab_type',
-        'wbc', 'rbc', 'hemoglobin', 'platelets',
-        'cholesterol', 'hdl', 'ldl', 'triglycerides', 'vldl',
-        'glucose', 'a1c',
-        'ph', 'specific_gravity', 'protein',
-        'ketones', 'blood', 'nitrites', 'leukocyte_esterase',
-        'risk_level'
-    ]
-
-    return pd.DataFrame(data, columns=columns)
+    # float32 is ample precision for lab values and halves the memory the
+    # scaler and models stream through (the trees bin to float32 anyway)
+    data = np.empty((samples_per_type * len(LAB_TYPES), len(COLUMNS)), dtype=np.float32)
+
+    for lab_type_idx, lab_type in enumerate(LAB_TYPES):
+        # Map uniform draws to risk levels; cheaper than choice() with p=
+        risks = np.searchsorted(
+            RISK_CUMULATIVE, RNG.random(samples_per_type, dtype=np.float32), side='right'
+        ).astype(np.int8)
+
+        # Start every row from the defaults, then overwrite the measured features
+        block = data[lab_type_idx * samples_per_type:(lab_type_idx + 1) * samples_per_type]
+        block[:] = DEFAULT_ROW
+        block[:, COLUMN_INDEX['lab_type']] = lab_type_idx
+        block[:, COLUMN_INDEX['risk_level']] = risks
+
+        for risk, (columns, lows, highs) in RANGE_ARRAYS[lab_type].items():
+            rows = np.flatnonzero(risks == risk)
+            block[np.ix_(rows, columns)] = RNG.uniform(lows, highs, size=(len(rows), len(columns)))
+
+    df = pd.DataFrame(data, columns=COLUMNS, copy=False)
+    # int8 lab_type keeps the feature matrix float32 (int64 would promote it to float64)
+    return df.astype({'lab_type': np.int8, 'risk_level': int})
 
 def train_models():
     """Train and save unified model with 10,000 samples"""
@@ -195,18 +260,28 @@ def train_models():
     save_dir = os.path.join(os.path.dirname(__file__), 'saved_models')
     os.makedirs(save_dir, exist_ok=True)
 
-    # Generate unified data
-    print("📊 Generating unified synthetic data (10,000 samples)...")
-    df = generate_unified_data(10000)
-    print("   ✓ Data generated: CBC, Urinalysis, Lipid profiles combined\n")
-    
-    # Save the dataset for reference
-    df.to_csv(os.path.join(os.path.dirname(__file__), 'synthetic_data_10000.csv'), index=False)
-    print(f"   ✓ Saved dataset to synthetic_data_10000.csv\n")
-
-    # Split features and target
+    # Generate unified data; the generator is seeded, so reuse the cached
+    # dataset from an earlier run of the same version instead of regenerating it
+    data_name = f'synthetic_data_10000_v{DATA_VERSION}.parquet'
+    data_path = os.path.join(os.path.dirname(__file__), data_name)
+    if os.path.exists(data_path):
+        df = pd.read_parquet(data_path)
+        print(f"📊 Loaded cached synthetic data from {data_name}\n")
+    else:
+        print("📊 Generating unified synthetic data (10,000 samples)...")
+        df = generate_unified_data(10000)
+        print("   ✓ Data generated: CBC, Urinalysis, Lipid profiles combined\n")
+
+        # Save the dataset for reference and for later runs
+        df.to_parquet(data_path, compression='zstd', index=False)
+        print(f"   ✓ Saved dataset to {data_name}\n")
+
+    # Split features and target; the split and models work on plain arrays,
+    # so keep the column names separately for features.json
     X = df.drop('risk_level', axis=1)
-    y = df['risk_level']
+    feature_names = list(X.columns)
+    X = X.to_numpy(dtype=np.float32)
+    y = df['risk_level'].to_numpy()
 
     # Split into train and test sets
     X_train, X_test, y_train, y_test = train_test_split(
@@ -215,56 +290,88 @@ def train_models():
 
     print(f"Training samples: {len(X_train)}, Test samples: {len(X_test)}\n")
 
-    # Train StandardScaler
-    print("🔧 Training feature scaler...")
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
-
-    # Train Gradient Boosting
-    print("🌲 Training Gradient Boosting model...")
-    gb_model = GradientBoostingClassifier(
-        n_estimators=150,
-        learning_rate=0.1,
-        max_depth=6,
-        random_state=42,
-        verbose=0
-    )
-    gb_model.fit(X_train_scaled, y_train)
-    gb_pred = gb_model.predict(X_test_scaled)
+    # Train Gradient Boosting (histogram-based: features are pre-binned, so
+    # split finding is far cheaper than GradientBoostingClassifier's).
+    # LABVIO_LIGHTGBM=1 trains with LightGBM instead: faster still, but
+    # without early stopping, and the API can't serve it through ONNX Runtime
+    if os.getenv('LABVIO_LIGHTGBM') == '1':
+        from lightgbm import LGBMClassifier
+        gb_model = LGBMClassifier(
+            n_estimators=150,
+            learning_rate=0.1,
+            max_depth=3,
+            num_leaves=8,  # Same tree size as the sklearn model below
+            n_jobs=N_PHYSICAL_CORES,  # Not -1: hyperthreads only oversubscribe
+            random_state=42,
+            verbose=-1
+        )
+    else:
+        gb_model = HistGradientBoostingClassifier(
+            max_iter=150,
+            learning_rate=0.1,
+            max_depth=3,  # At most 8 leaves per tree; deeper trees overfit this synthetic data
+            # Stop once the held-out loss stops improving instead of always growing 150 trees
+            early_stopping=True,
+            n_iter_no_change=10,
+            validation_fraction=0.1,
+            random_state=42,
+            verbose=0
+        )
+    print(f"🌲 Training Gradient Boosting model ({type(gb_model).__name__})...")
+    gb_model.fit(X_train, y_train)
+    gb_pred = gb_model.predict(X_test)
     gb_accuracy = accuracy_score(y_test, gb_pred)
+    if isinstance(gb_model, HistGradientBoostingClassifier):
+        print(f"   Iterations: {gb_model.n_iter_} of {gb_model.max_iter}")
     print(f"   Accuracy: {gb_accuracy:.3f}")
 
-    # Train Logistic Regression
+    # Train Logistic Regression, with its feature scaler in the same pipeline
+    # (scaling only matters here; tree splits are scale-invariant)
     print("📈 Training Logistic Regression model...")
-    lr_model = LogisticRegression(
-        max_iter=1000,
-        random_state=42,
-        multi_class='multinomial'
-    )
-    lr_model.fit(X_train_scaled, y_train)
-    lr_pred = lr_model.predict(X_test_scaled)
+    lr_model = Pipeline([
+        ('scaler', StandardScaler()),
+        ('lr', LogisticRegression(
+            max_iter=1000,
+            random_state=42,
+            solver='lbfgs',  # Fits a multinomial model for the 3 risk classes
+            n_jobs=N_PHYSICAL_CORES
+        ))
+    ])
+    lr_model.fit(X_train, y_train)
+    lr_pred = lr_model.predict(X_test)
     lr_accuracy = accuracy_score(y_test, lr_pred)
     print(f"   Accuracy: {lr_accuracy:.3f}\n")
 
-    print("📊 Unified Model Classification Report:")
-    print(classification_report(y_test, gb_pred, target_names=['Low', 'Moderate', 'High']))
+    # Set LABVIO_REPORT=0 to skip the per-class report (e.g. automated retraining)
+    if os.getenv('LABVIO_REPORT', '1') == '1':
+        print("📊 Unified Model Classification Report:")
+        print(classification_report(y_test, gb_pred, target_names=['Low', 'Moderate', 'High']))
 
     # Save models
-    scaler_path = os.path.join(save_dir, 'scaler.pkl')
     gb_path = os.path.join(save_dir, 'gradient_boosting.pkl')
     lr_path = os.path.join(save_dir, 'logistic_regression.pkl')
-    features_path = os.path.join(save_dir, 'features.pkl')
-
-    joblib.dump(scaler, scaler_path)
-    joblib.dump(gb_model, gb_path)
-    joblib.dump(lr_model, lr_path)
-    joblib.dump(list(X.columns), features_path)
+    features_path = os.path.join(save_dir, 'features.json')
+
+    # Drop artifacts an older run may have left; features.json now records
+    # that the tree model takes raw input, and the others have been superseded
+    for stale in ('scaler.pkl', 'features.pkl'):
+        stale_path = os.path.join(save_dir, stale)
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+    if 'n_jobs' in gb_model.get_params():
+        # n_jobs is pickled with the model; the API predicts a row at a time
+        # and must not start an OpenMP thread team per request (or before fork)
+        gb_model.set_params(n_jobs=1)
+    joblib.dump(gb_model, gb_path, **DUMP_OPTIONS)
+    joblib.dump(lr_model, lr_path, **DUMP_OPTIONS)
+    with open(features_path, 'w') as f:
+        # The tree model is fitted on raw features; the API refuses to serve
+        # a model marked scaled_input without its scaler.pkl
+        json.dump({'features': feature_names, 'scaled_input': False}, f)
 
     print(f"\n💾 Saving unified model...")
-    print(f"   ✓ Scaler: {scaler_path}")
     print(f"   ✓ Gradient Boosting: {gb_path}")
-    print(f"   ✓ Logistic Regression: {lr_path}")
+    print(f"   ✓ Logistic Regression (with scaler): {lr_path}")
     print(f"   ✓ Features: {features_path}")
 
     # Save info
@@ -276,9 +383,10 @@ def train_models():
         f.write(f"  - Training samples: 10,000 (CBC + Urinalysis + Lipid)\n")
         f.write(f"  - Gradient Boosting Accuracy: {gb_accuracy:.3f}\n")
         f.write(f"  - Logistic Regression Accuracy: {lr_accuracy:.3f}\n\n")
-        f.write("Features (19):\n")
+        f.write(f"Features ({len(feature_names)}):\n")
         f.write("  - lab_type: Lab type identifier (0=CBC, 1=Urinalysis, 2=Lipid)\n")
         f.write("  - CBC: WBC, RBC, Hemoglobin, Platelets\n")
+        f.write("  - CBC differential (decimals, 0.0 for other lab types): Neutrophils, Lymphocytes, Monocytes, Eosinophils, Basophils\n")
         f.write("  - Lipid: Cholesterol, HDL, LDL, Triglycerides, VLDL\n")
         f.write("  - Glucose/A1C: Glucose, A1C\n")
         f.write("  - Urinalysis: pH, Specific Gravity, Protein, Ketones, Blood, Nitrites, Leukocyte Esterase\n\n")